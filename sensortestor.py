@@ -5,6 +5,7 @@ import Adafruit_BMP.BMP085 as BMP085
 import adafruit_dht
 import adafruit_bh1750
 import csv
+import math
 import os
 from datetime import datetime
 import subprocess
@@ -14,27 +15,65 @@ sys.stdout.reconfigure(line_buffering=True)
 
 
 def median(data):
-    # Sort the data
-    sorted_data = sorted(data)
-    n = len(sorted_data)
+    # Quickselect (Hoare partition, median-of-3 pivot). Reorders data in place.
+    a = data
+    n = len(a)
+    k = n // 2
+    lo, hi = 0, n - 1
+    while lo < hi:
+        mid = (lo + hi) // 2
+        # Median-of-3: order a[lo] <= a[mid] <= a[hi]
+        if a[mid] < a[lo]:
+            a[lo], a[mid] = a[mid], a[lo]
+        if a[hi] < a[lo]:
+            a[lo], a[hi] = a[hi], a[lo]
+        if a[hi] < a[mid]:
+            a[mid], a[hi] = a[hi], a[mid]
+        pivot = a[mid]
+
+        i, j = lo, hi
+        while i <= j:
+            while a[i] < pivot:
+                i += 1
+            while pivot < a[j]:
+                j -= 1
+            if i <= j:
+                a[i], a[j] = a[j], a[i]
+                i += 1
+                j -= 1
+
+        # Keep only the side that still contains index k
+        if j < k:
+            lo = i
+        if k < i:
+            hi = j
 
     # Check if the length of the list is odd
     if n % 2 == 1:
         # Return the middle element
-        return sorted_data[n // 2]
+        return a[k]
     else:
-        # Return the average of the two middle elements
-        mid1 = sorted_data[n // 2 - 1]
-        mid2 = sorted_data[n // 2]
+        # Everything left of k is <= a[k]; the other middle element is its max
+        mid1 = max(a[i] for i in range(k))
+        mid2 = a[k]
         return (mid1 + mid2) / 2
         
         
+def next_deadline(deadline, period):
+    # Advance a monotonic deadline by one period, skipping slots already missed
+    deadline += period
+    now = time.monotonic()
+    if now > deadline:
+        deadline += period * math.ceil((now - deadline) / period)
+    return deadline
+
+
 # Initialize sensors
 bmp_sensor = BMP085.BMP085()
 dht_sensor = adafruit_dht.DHT11(board.D4)
 i2c = busio.I2C(board.SCL, board.SDA)
 #light_sensor = adafruit_bh1750.BH1750(i2c)
-light_sensor = adafruit_bh1750.BH1750(i2c, resolution = HIGH)
+light_sensor = adafruit_bh1750.BH1750(i2c, resolution = adafruit_bh1750.Resolution.HIGH)
 # File paths
 local_csv = "/home/njm/weather_data.csv"  # File on Raspberry Pi
 server_csv_path = "/media/bigdata/weather_station/weather_data.csv"  # File path on server
@@ -49,8 +88,12 @@ if not os.path.exists(local_csv):
 
 print("Weather Station Initialized! Harvesting data...\n")
 write_timer = time.time()
+# Fixed 10 s cadence carried across iterations, so work and transfers don't add drift
+deadline = time.monotonic()
 
 while True:
+    # End of this iteration's slot; overruns jump to the next future slot, not back-to-back
+    deadline = next_deadline(deadline, 10)
     try:
     
         temperature_bmp_l = []
@@ -61,22 +104,23 @@ while True:
         light_level_l = []
     
     
-        for i in range(10):        
-            # Gather data
-            temperature_bmp_l = bmp_sensor.read_temperature()
-            pressure_l = bmp_sensor.read_pressure() / 100  # Convert to hPa
-            altitude_l = bmp_sensor.read_altitude()
-            temperature_dht_l = dht_sensor.temperature
-            humidity_l = dht_sensor.humidity
-            light_level_l = light_sensor.lux
-
-            # Log data locally
-            with open(local_csv, "a", newline="") as csvfile:
-                writer = csv.writer(csvfile)
-                writer.writerow([timestamp, temperature_bmp, pressure, altitude,
-                                 temperature_dht, humidity, light_level])
-            if i == 4:
-                timestamp = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC")
+        # One timestamp per block
+        timestamp = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC")
+
+        # Log data locally: one open for all 10 rows of the block
+        with open(local_csv, "a", newline="") as csvfile:
+            writer = csv.writer(csvfile)
+            for _ in range(10):
+                # Gather data
+                temperature_bmp_l.append(bmp_sensor.read_temperature())
+                pressure_l.append(bmp_sensor.read_pressure() / 100)  # Convert to hPa
+                altitude_l.append(bmp_sensor.read_altitude())
+                temperature_dht_l.append(dht_sensor.temperature)
+                humidity_l.append(dht_sensor.humidity)
+                light_level_l.append(light_sensor.lux)
+
+                writer.writerow([timestamp, temperature_bmp_l[-1], pressure_l[-1], altitude_l[-1],
+                                 temperature_dht_l[-1], humidity_l[-1], light_level_l[-1]])
 
 
         temperature_bmp = median(temperature_bmp_l)
@@ -92,13 +136,6 @@ while True:
         print(f"BMP Temperature: {temperature_bmp:.2f} °C, Pressure: {pressure:.2f} hPa, Altitude: {altitude:.2f} m")
         print(f"DHT Temperature: {temperature_dht:.2f} °C, Humidity: {humidity:.2f} %")
         print(f"BH1750 Light: {light_level:.2f} lx\n")
-        
-        # Transfer data to server every minute
-        print(time_to_write)
-
-
-
-        time.sleep(10)  # Wait 10 seconds before the next reading
 
 
 
@@ -121,10 +158,14 @@ while True:
             except subprocess.CalledProcessError as e:
                 print(f"Error transferring data to the server: {e}\n")
 
+        # Wait for the end of this 10 s slot
+        time.sleep(max(0, deadline - time.monotonic()))
+
     except RuntimeError as e:
         # Handle sensor read errors
         print(f"Sensor error: {e}")
-        time.sleep(2)
+        # Retry on the next slot; the deadline was already advanced for this one
+        time.sleep(max(0, deadline - time.monotonic()))
     except Exception as e:
         print(f"Unexpected error: {e}")
         break
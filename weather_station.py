@@ -1,10 +1,15 @@
 #!/usr/bin/env python3
 import glob
+import heapq
+import math
 import os
+import re
+import shlex
 import sys
 import csv
 import time
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 import numpy as np
@@ -23,6 +28,13 @@ try:
 except Exception:
     _HAVE_DHT = False
 
+# Optional Numba; without it median blocks use the heapq-based _nanmedian_small
+try:
+    import numba
+    _HAVE_NUMBA = True
+except Exception:
+    _HAVE_NUMBA = False
+
 # -----------------------------
 # Config
 # -----------------------------
@@ -39,44 +51,113 @@ SERVER_SYSTEM_CSV = os.path.join(SERVER_BASE, "system_usage.csv")
 
 LOW_LIGHT_LUX = 100.0
 MAX_IMAGE_FILES = 100
+IMAGE_CHUNK_MAX_BYTES = 8 * 1024 * 1024  # per scp; ~2 min at the bandwidth limit
 SCP_MAX_RETRIES = 3
 SCP_BANDWIDTH_LIMIT_KBPS = "500"
 SCP_CONNECT_TIMEOUT_S = "10"
+SSH_COMMAND_TIMEOUT_S = 60        # hard cap on any single ssh invocation
+REMOTE_LEDGER_KEEP = 100          # spool names kept in each server-side "<csv>.sent"
+# scp timeout = base + margin x (bytes / bandwidth limit); see scp_timeout()
+SCP_TIMEOUT_BASE_S = 60
+SCP_TIMEOUT_MARGIN = 2.0
+# All scp/ssh calls ride one multiplexed SSH connection (opened by start_ssh_master);
+# ControlMaster=auto lets the next transfer reopen it if it ever drops
+SSH_CONTROL_PATH = "~/.ssh/cm-tempestas"
+SSH_CONTROL_PERSIST = "1h"
+# Detect a silently dead link (DDNS IP change, NAT timeout) within ~45 s
+SSH_KEEPALIVE_OPTS = [
+    "-o", "ServerAliveInterval=15",
+    "-o", "ServerAliveCountMax=3",
+]
+SSH_MUX_OPTS = [
+    *SSH_KEEPALIVE_OPTS,
+    "-o", "ControlMaster=auto",
+    "-o", f"ControlPath={SSH_CONTROL_PATH}",
+    "-o", f"ControlPersist={SSH_CONTROL_PERSIST}",
+]
 
 SAMPLE_BLOCK_SECONDS = 300        # send data every 5 minutes
-DELETE_BLOCK_SECONDS = 600        # clear local CSVs every 10 minutes
+DELETE_BLOCK_SECONDS = 600        # trim the unsent-upload backlog every 10 minutes
+SPOOL_MAX_BYTES = 16 * 1024 * 1024  # per CSV; oldest unsent spools go first past this
 MEDIAN_SAMPLES_DURATION = 5       # seconds per median block
 MEDIAN_SAMPLES_INTERVAL = 0.1     # seconds between samples
+VERBOSE = False                   # also print every single-shot makedata() sample
 
 sys.stdout.reconfigure(line_buffering=True)
 
 # -----------------------------
 # Utilities
 # -----------------------------
+# Header lines exactly as csv.writer would emit them (comma-joined, CRLF)
+_WEATHER_HEADER_BYTES = (
+    b"Timestamp,BMP_Temperature_C,BMP_Pressure_hPa,BMP_Altitude_m,"
+    b"DHT_Temperature_C,DHT_Humidity_percent,BH1750_Light_lx\r\n"
+)
+_SYSTEM_HEADER_BYTES = (
+    b"Timestamp,CPU_Temperature_C,CPU_Usage_percent,Memory_Usage_percent\r\n"
+)
+CSV_BUFFER_BYTES = 1 << 15
+
 def ensure_paths():
     os.makedirs(IMAGE_DIR, exist_ok=True)
-    # ensure CSV headers exist
-    if not os.path.exists(LOCAL_WEATHER_CSV):
-        with open(LOCAL_WEATHER_CSV, "w", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow([
-                "Timestamp",
-                "BMP_Temperature_C",
-                "BMP_Pressure_hPa",
-                "BMP_Altitude_m",
-                "DHT_Temperature_C",
-                "DHT_Humidity_percent",
-                "BH1750_Light_lx",
-            ])
-    if not os.path.exists(LOCAL_SYSTEM_CSV):
-        with open(LOCAL_SYSTEM_CSV, "w", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow([
-                "Timestamp",
-                "CPU_Temperature_C",
-                "CPU_Usage_percent",
-                "Memory_Usage_percent",
-            ])
+
+def open_csv(path, header):
+    """Open a CSV for buffered appends; write the header if the file is new/empty."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.write(fd, header)
+        finally:
+            os.close(fd)
+    fp = open(path, "a", newline="", buffering=CSV_BUFFER_BYTES)
+    return fp, csv.writer(fp)
+
+def queue_rows(weather_row, system_row):
+    """
+    Hold a sample's rows in memory until the next flush_csvs().
+    Both rows start with the same time.time_ns() int; it is formatted at flush.
+    """
+    _weather_rows.append(weather_row)
+    _system_rows.append(system_row)
+
+def spool_csv(path, fp, header):
+    """
+    Move everything logged so far in path to a new "<path>.<time_ns>.sending"
+    spool and reopen path empty, so rows written during/after the upload land
+    in the new file. Spools are never modified after this; each is uploaded
+    once, in order, and deleted only when that upload succeeds.
+    Returns (fp, writer) for the reopened log.
+    """
+    fp.close()
+    os.rename(path, f"{path}.{time.time_ns()}.sending")
+    return open_csv(path, header)
+
+def pending_spools(path):
+    """Spools of path still waiting for upload, oldest first."""
+    return sorted(glob.glob(f"{glob.escape(path)}.*.sending"))
+
+def flush_csvs(sync=False):
+    """Write queued rows in one batch, then push buffered bytes to the OS.
+    With sync=True also fsync to the SD card."""
+    # rows are queued in pairs sharing one time_ns stamp: format it once per pair,
+    # into new lists so the queued rows are never half-converted
+    weather_out, system_out = [], []
+    try:
+        for weather_row, system_row in zip(_weather_rows, _system_rows):
+            stamp = format_timestamp(weather_row[0])
+            weather_out.append([stamp, *weather_row[1:]])
+            system_out.append([stamp, *system_row[1:]])
+        if weather_out:
+            _weather_writer.writerows(weather_out)
+            _system_writer.writerows(system_out)
+    finally:
+        # a failed write (ENOSPC, SD error) drops this batch rather than wedging every later flush
+        _weather_rows.clear()
+        _system_rows.clear()
+    for fp in (_weather_fp, _system_fp):
+        fp.flush()
+        if sync:
+            os.fsync(fp.fileno())
 
 def safe_float(x, default=np.nan):
     try:
@@ -86,10 +167,117 @@ def safe_float(x, default=np.nan):
     except Exception:
         return default
 
+def _nanmedian_small(vals):
+    """
+    NaN-ignoring median for short Python lists (a median block is ~50 samples).
+    Partial selection with heapq avoids np.nanmedian's array allocation and full sort.
+    """
+    filtered = [v for v in vals if v == v]  # NaN != NaN
+    n = len(filtered)
+    if n == 0:
+        return np.nan
+    k = n // 2
+    lowest = heapq.nsmallest(k + 1, filtered)
+    if n % 2:
+        return lowest[-1]
+    return (lowest[-2] + lowest[-1]) / 2.0
+
+def _jit(fn):
+    return numba.njit(cache=True)(fn) if _HAVE_NUMBA else fn
+
+@_jit
+def _nanmedian_inplace(a):
+    """
+    NaN-ignoring median of a 1-D float64 array; reorders a, so pass a scratch buffer.
+    Quickselect (Hoare partition, median-of-3 pivot) instead of a full sort.
+    """
+    # compact the non-NaN values to the front
+    m = 0
+    for i in range(a.shape[0]):
+        v = a[i]
+        if v == v:
+            a[m] = v
+            m += 1
+    if m == 0:
+        return np.nan
+
+    k = m // 2
+    lo = 0
+    hi = m - 1
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if a[mid] < a[lo]:
+            a[lo], a[mid] = a[mid], a[lo]
+        if a[hi] < a[lo]:
+            a[lo], a[hi] = a[hi], a[lo]
+        if a[hi] < a[mid]:
+            a[mid], a[hi] = a[hi], a[mid]
+        pivot = a[mid]
+        i = lo
+        j = hi
+        while i <= j:
+            while a[i] < pivot:
+                i += 1
+            while pivot < a[j]:
+                j -= 1
+            if i <= j:
+                a[i], a[j] = a[j], a[i]
+                i += 1
+                j -= 1
+        if j < k:
+            lo = i
+        if k < i:
+            hi = j
+
+    if m % 2 == 1:
+        return a[k]
+    # a[:k] <= a[k]; the lower middle value is the max of that side
+    lower = a[0]
+    for i in range(1, k):
+        if a[i] > lower:
+            lower = a[i]
+    return 0.5 * (lower + a[k])
+
+@_jit
+def _aggregate(bmp_t, press, alt, dht_t, hum, lux, cpu_t, cpu_u, mem):
+    """Per-channel NaN-ignoring medians of one median block."""
+    return (
+        _nanmedian_inplace(bmp_t), _nanmedian_inplace(press), _nanmedian_inplace(alt),
+        _nanmedian_inplace(dht_t), _nanmedian_inplace(hum), _nanmedian_inplace(lux),
+        _nanmedian_inplace(cpu_t), _nanmedian_inplace(cpu_u), _nanmedian_inplace(mem),
+    )
+
+def format_timestamp(ts_ns):
+    """Local time from time.time_ns(), laid out like str(datetime.now())."""
+    return datetime.fromtimestamp(ts_ns / 1e9).isoformat(" ")
+
+def next_deadline(deadline, period):
+    """Advance a monotonic deadline by one period, skipping slots already missed."""
+    deadline += period
+    now = time.monotonic()
+    if now > deadline:
+        deadline += period * math.ceil((now - deadline) / period)
+    return deadline
+
+def sleep_until(deadline):
+    delay = deadline - time.monotonic()
+    if delay > 0:
+        time.sleep(delay)
+
+def _open_readonly(path):
+    try:
+        return os.open(path, os.O_RDONLY)
+    except OSError:
+        return None
+
+# Kept open for the process lifetime; pread at offset 0 returns a fresh value
+_cpu_temp_fd = _open_readonly("/sys/class/thermal/thermal_zone0/temp")
+_meminfo_fd = _open_readonly("/proc/meminfo")
+_MEMINFO_RE = re.compile(rb"MemTotal:\s+(\d+).*?MemAvailable:\s+(\d+)", re.S)
+
 def get_cpu_temp():
     try:
-        with open("/sys/class/thermal/thermal_zone0/temp", "r") as f:
-            return float(int(f.read()) / 1000.0)
+        return int(os.pread(_cpu_temp_fd, 32, 0)) / 1000.0
     except Exception:
         return np.nan
 
@@ -103,9 +291,57 @@ def get_cpu_usage():
     return psutil.cpu_percent(interval=None)
 
 def get_memory_usage():
-    return float(psutil.virtual_memory().percent)
+    """Used memory % as psutil computes it: (total - available) / total."""
+    try:
+        m = _MEMINFO_RE.search(os.pread(_meminfo_fd, 2048, 0))
+        total, available = int(m.group(1)), int(m.group(2))
+        return 100.0 * (total - available) / total
+    except Exception:
+        return float(psutil.virtual_memory().percent)
 
-def scp_with_retries(local_path, remote_spec):
+def start_ssh_master():
+    """Open the background SSH master connection unless one is already running."""
+    control_path = os.path.expanduser(SSH_CONTROL_PATH)
+    try:
+        check = subprocess.run(
+            ["ssh", "-S", control_path, "-O", "check", SERVER_ADDRESS],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            timeout=SSH_COMMAND_TIMEOUT_S
+        )
+        if check.returncode == 0:
+            return True
+    except subprocess.TimeoutExpired:
+        pass
+    try:
+        subprocess.run(
+            [
+                "ssh", "-M", "-N", "-f",
+                "-S", control_path,
+                "-o", f"ControlPersist={SSH_CONTROL_PERSIST}",
+                "-o", f"ConnectTimeout={SCP_CONNECT_TIMEOUT_S}",
+                *SSH_KEEPALIVE_OPTS,
+                SERVER_ADDRESS
+            ],
+            check=True,
+            timeout=SSH_COMMAND_TIMEOUT_S
+        )
+        print(f"✓ SSH master connection up: {control_path}")
+        return True
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+        print(f"✗ SSH master connection failed: {e}")
+        return False
+
+def scp_timeout(local_paths):
+    """Hard cap for one scp of local_paths, scaled to their size at the -l limit."""
+    total_bytes = sum(os.path.getsize(path) for path in local_paths)
+    bytes_per_s = int(SCP_BANDWIDTH_LIMIT_KBPS) * 1000 / 8  # scp -l is Kbit/s
+    return SCP_TIMEOUT_BASE_S + SCP_TIMEOUT_MARGIN * total_bytes / bytes_per_s
+
+def scp_with_retries(local_paths, remote_spec):
+    """Copy one path or a list of paths in a single scp invocation."""
+    if isinstance(local_paths, str):
+        local_paths = [local_paths]
+    timeout = scp_timeout(local_paths)
     for attempt in range(1, SCP_MAX_RETRIES + 1):
         try:
             subprocess.run(
@@ -113,35 +349,100 @@ def scp_with_retries(local_path, remote_spec):
                     "scp", "-v",
                     "-l", SCP_BANDWIDTH_LIMIT_KBPS,
                     "-o", f"ConnectTimeout={SCP_CONNECT_TIMEOUT_S}",
-                    local_path, remote_spec
+                    *SSH_MUX_OPTS,
+                    *local_paths, remote_spec
                 ],
-                check=True
+                check=True,
+                timeout=timeout
             )
-            print(f"✓ Copied: {local_path} -> {remote_spec}")
+            label = local_paths[0] if len(local_paths) == 1 else f"{len(local_paths)} files"
+            print(f"✓ Copied: {label} -> {remote_spec}")
             return True
-        except subprocess.CalledProcessError as e:
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
             print(f"✗ SCP error (attempt {attempt}): {e}")
             if attempt < SCP_MAX_RETRIES:
                 time.sleep(5)
     return False
 
+def append_remote_with_retries(spool_path, remote_path, header):
+    """
+    Append the rows of a spool (header skipped) to remote_path on the server,
+    writing the header first if the remote file is missing or empty.
+
+    Guards against re-sending a spool: it is copied to "<remote>.<spool>.part",
+    and one server-side command appends it only if the spool's name isn't already
+    listed in "<remote>.sent", then records it there and removes the part file.
+    A retry after the command finished (e.g. ssh dying on the way back) is a no-op.
+    The append and the ledger write are not atomic, though: if the remote shell
+    is killed between them, a retry appends that spool's rows again.
+
+    Spools upload strictly in order, so only the most recent names can ever be
+    retried; the ledger is trimmed to the last REMOTE_LEDGER_KEEP entries.
+    """
+    if os.path.getsize(spool_path) <= len(header):
+        print(f"No new rows in {spool_path}")
+        return True
+
+    spool_id = os.path.basename(spool_path)
+    part_path = f"{remote_path}.{spool_id}.part"
+    if not scp_with_retries(spool_path, f"{SERVER_ADDRESS}:{part_path}"):
+        return False
+
+    remote = shlex.quote(remote_path)
+    part = shlex.quote(part_path)
+    ledger = shlex.quote(remote_path + ".sent")
+    ledger_tmp = shlex.quote(remote_path + ".sent.tmp")
+    sid = shlex.quote(spool_id)
+    remote_cmd = (
+        # ignore hangups so a dropped connection doesn't split append and record
+        f"trap '' HUP PIPE; "
+        f"if ! grep -qxF {sid} {ledger} 2>/dev/null; then "
+        f"[ -s {remote} ] || printf %s {shlex.quote(header.decode())} > {remote}; "
+        f"tail -c +{len(header) + 1} {part} >> {remote} && echo {sid} >> {ledger} && "
+        f"tail -n {REMOTE_LEDGER_KEEP} {ledger} > {ledger_tmp} && mv {ledger_tmp} {ledger}; "
+        f"fi && rm -f {part}"
+    )
+    for attempt in range(1, SCP_MAX_RETRIES + 1):
+        try:
+            subprocess.run(
+                [
+                    "ssh",
+                    "-o", f"ConnectTimeout={SCP_CONNECT_TIMEOUT_S}",
+                    *SSH_MUX_OPTS,
+                    SERVER_ADDRESS, remote_cmd
+                ],
+                check=True,
+                timeout=SSH_COMMAND_TIMEOUT_S
+            )
+            print(f"✓ Appended: {spool_path} -> {remote_path}")
+            return True
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+            print(f"✗ SSH append error (attempt {attempt}): {e}")
+            if attempt < SCP_MAX_RETRIES:
+                time.sleep(5)
+    return False
+
+def _rel_change(prev_meta, curr_meta, key):
+    """Relative change of a metadata value; 0.0 when missing, NaN or zero."""
+    pv = prev_meta.get(key)
+    cv = curr_meta.get(key)
+    if not pv or cv is None:
+        return 0.0
+    try:
+        return abs(cv - pv) / pv
+    except TypeError:
+        return 0.0
+
 def is_stable(prev_meta, curr_meta, threshold=0.05):
     """
     Returns True if relative change in each key is <= threshold.
     Picamera2 metadata keys: 'ExposureTime', 'AnalogueGain', etc.
     """
-    keys_to_check = ["ExposureTime", "AnalogueGain"]
-    for key in keys_to_check:
-        if key in prev_meta and key in curr_meta:
-            pv = safe_float(prev_meta.get(key))
-            cv = safe_float(curr_meta.get(key))
-            if np.isnan(pv) or pv == 0 or np.isnan(cv):
-                continue
-            print(f"{key} : {cv}")
-            rel = abs(cv - pv) / pv
-            if rel > threshold:
-                return False
-    return True
+    # NaN comparisons are False, so NaN readings count as stable like before
+    return not (
+        _rel_change(prev_meta, curr_meta, "ExposureTime") > threshold
+        or _rel_change(prev_meta, curr_meta, "AnalogueGain") > threshold
+    )
 
 # -----------------------------
 # Sensor init
@@ -177,6 +478,13 @@ except Exception as e:
 # Camera
 picam2 = Picamera2()
 picam2.configure(picam2.create_still_configuration())
+# Left running between shots so AE/AWB stay converged; stopped in main() on exit
+picam2.start()
+
+# CSV logs: one persistent buffered handle per file instead of open/close per row
+_weather_fp, _weather_writer = open_csv(LOCAL_WEATHER_CSV, _WEATHER_HEADER_BYTES)
+_system_fp, _system_writer = open_csv(LOCAL_SYSTEM_CSV, _SYSTEM_HEADER_BYTES)
+_weather_rows, _system_rows = [], []
 
 # -----------------------------
 # Data capture
@@ -184,13 +492,22 @@ picam2.configure(picam2.create_still_configuration())
 # numeric global to avoid None surprises
 light_level = 0.0
 
+# Sensors block on their buses independently, so read them side by side
+_sensor_pool = ThreadPoolExecutor(max_workers=4)
+
 def read_dht():
-    """Return (temp_C, humidity_pct) or (nan, nan) if unavailable."""
+    """
+    Return (temp_C, humidity_pct) or (nan, nan) if unavailable.
+    One measure() call for both values; the driver itself skips re-reading the
+    wire within its 2 s minimum interval and keeps the previous values.
+    """
     if dht_sensor is None:
         return (np.nan, np.nan)
     try:
-        t = safe_float(dht_sensor.temperature)
-        h = safe_float(dht_sensor.humidity)
+        # .temperature/.humidity each call measure(); do it once and read the results
+        dht_sensor.measure()
+        t = safe_float(dht_sensor._temperature)
+        h = safe_float(dht_sensor._humidity)
         return (t, h)
     except Exception:
         return (np.nan, np.nan)
@@ -204,111 +521,184 @@ def read_bh1750():
     except Exception:
         return np.nan
 
+def _bmp_read_all(sealevel_pa=101325.0):
+    """
+    Return (temp_C, pressure_Pa, altitude_m) from one raw temperature and one raw
+    pressure conversion. The driver's read_pressure() re-reads temperature and
+    read_altitude() re-reads both, so calling all three costs five conversions.
+    Compensation follows the BMP085 datasheet, as in Adafruit_BMP.BMP085.
+    """
+    s = bmp_sensor
+    UT = s.read_raw_temp()
+    UP = s.read_raw_pressure()
+
+    X1 = ((UT - s.cal_AC6) * s.cal_AC5) >> 15
+    X2 = (s.cal_MC << 11) // (X1 + s.cal_MD)
+    B5 = X1 + X2
+    temperature = ((B5 + 8) >> 4) / 10.0
+
+    B6 = B5 - 4000
+    X1 = (s.cal_B2 * (B6 * B6) >> 12) >> 11
+    X2 = (s.cal_AC2 * B6) >> 11
+    X3 = X1 + X2
+    B3 = (((s.cal_AC1 * 4 + X3) << s._mode) + 2) // 4
+    X1 = (s.cal_AC3 * B6) >> 13
+    X2 = (s.cal_B1 * ((B6 * B6) >> 12)) >> 16
+    X3 = ((X1 + X2) + 2) >> 2
+    B4 = (s.cal_AC4 * (X3 + 32768)) >> 15
+    B7 = (UP - B3) * (50000 >> s._mode)
+    if B7 < 0x80000000:
+        p = (B7 * 2) // B4
+    else:
+        p = (B7 // B4) * 2
+    X1 = (p >> 8) * (p >> 8)
+    X1 = (X1 * 3038) >> 16
+    X2 = (-7357 * p) >> 16
+    pressure = p + ((X1 + X2 + 3791) >> 4)
+
+    altitude = 44330.0 * (1.0 - pow(pressure / sealevel_pa, 1.0 / 5.255))
+    return (temperature, pressure, altitude)
+
+def read_bmp():
+    """Return (temp_C, pressure_hPa, altitude_m). One device, so its reads stay serial."""
+    temperature, pressure, altitude = _bmp_read_all()
+    return (safe_float(temperature), safe_float(pressure) / 100.0, safe_float(altitude))
+
+def read_system():
+    """Return (cpu_temp_C, cpu_usage_pct, memory_usage_pct)."""
+    return (get_cpu_temp(), get_cpu_usage(), get_memory_usage())
+
+def read_sensors():
+    """
+    Read BMP, BH1750, DHT and system stats concurrently.
+    Returns (bmp, lux, dht, system); latency is the slowest read, not the sum.
+    """
+    bmp = _sensor_pool.submit(read_bmp)
+    lux = _sensor_pool.submit(read_bh1750)
+    dht = _sensor_pool.submit(read_dht)
+    system = _sensor_pool.submit(read_system)
+    return bmp.result(), lux.result(), dht.result(), system.result()
+
 def makedata():
     """Single-shot sample and append to CSVs."""
     global light_level
-    timestamp = datetime.now()
-    temperature_bmp = safe_float(bmp_sensor.read_temperature())
-    pressure = safe_float(bmp_sensor.read_pressure()) / 100.0  # hPa
-    altitude = safe_float(bmp_sensor.read_altitude())
-    light_level = read_bh1750()
-
-    temperature_dht, humidity = read_dht()
-    cpu_temp = get_cpu_temp()
-    cpu_usage = get_cpu_usage()
-    memory_usage = get_memory_usage()
-
-    with open(LOCAL_WEATHER_CSV, "a", newline="") as csvfile:
-        writer = csv.writer(csvfile)
-        writer.writerow([
-            timestamp, temperature_bmp, pressure, altitude,
-            temperature_dht, humidity, light_level
-        ])
-
-    with open(LOCAL_SYSTEM_CSV, "a", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow([timestamp, cpu_temp, cpu_usage, memory_usage])
-
-    print("\n\t-----------------------------------------")
-    print(f"\tData logged at {timestamp}")
-    print(f"\tBMP Temperature: {temperature_bmp:.2f} °C, Pressure: {pressure:.2f} hPa, Altitude: {altitude:.2f} m")
-    print(f"\tDHT Temperature: {temperature_dht:.2f} °C, Humidity: {humidity:.2f} %")
-    print(f"\tBH1750 Light: {light_level:.2f} lx")
-    print(f"\tCPU Temperature: {cpu_temp:.2f}°C")
-    print(f"\tCPU Usage: {cpu_usage:.1f}%")
-    print(f"\tMemory Usage: {memory_usage:.1f}%")
-    print("\t-----------------------------------------\n")
+    ts_ns = time.time_ns()
+    bmp, light_level, dht, system = read_sensors()
+    temperature_bmp, pressure, altitude = bmp
+    temperature_dht, humidity = dht
+    cpu_temp, cpu_usage, memory_usage = system
+
+    queue_rows(
+        [ts_ns, temperature_bmp, pressure, altitude,
+         temperature_dht, humidity, light_level],
+        [ts_ns, cpu_temp, cpu_usage, memory_usage],
+    )
+
+    if VERBOSE:
+        sys.stdout.write(
+            "\n\t-----------------------------------------\n"
+            f"\tData logged at {format_timestamp(ts_ns)}\n"
+            f"\tBMP Temperature: {temperature_bmp:.2f} °C, Pressure: {pressure:.2f} hPa, Altitude: {altitude:.2f} m\n"
+            f"\tDHT Temperature: {temperature_dht:.2f} °C, Humidity: {humidity:.2f} %\n"
+            f"\tBH1750 Light: {light_level:.2f} lx\n"
+            f"\tCPU Temperature: {cpu_temp:.2f}°C\n"
+            f"\tCPU Usage: {cpu_usage:.1f}%\n"
+            f"\tMemory Usage: {memory_usage:.1f}%\n"
+            "\t-----------------------------------------\n\n"
+        )
+
+# Sample columns for makedata_time, one row per channel; grown on demand, reused per block
+_block_buf = np.empty((9, 0))
+
+def _block_buffers(n):
+    """Nine contiguous float64 columns with room for n samples each."""
+    global _block_buf
+    if _block_buf.shape[1] < n:
+        _block_buf = np.empty((9, n))
+    return _block_buf
 
 def makedata_time(sample_duration=10, sample_interval=1.0):
     """
-    Collect samples for a duration, aggregate with nanmedian, and append to CSVs.
+    Collect samples for a duration, aggregate with a NaN-ignoring median, and append to CSVs.
     """
-    bmp_temps, pressures, altitudes = [], [], []
-    dht_temps, humidities, light_levels = [], [], []
-    cpu_temps, cpu_usages, memory_usages = [], [], []
-
-    end_time = time.time() + sample_duration
-    while time.time() < end_time:
+    # one float64 column per channel (SoA); a few spare slots for timing jitter
+    n_est = int(sample_duration / sample_interval) + 4
+    (bmp_temps, pressures, altitudes,
+     dht_temps, humidities, light_levels,
+     cpu_temps, cpu_usages, memory_usages) = _block_buffers(n_est)
+    n = 0
+
+    # fixed sampling grid on the monotonic clock; slow reads skip slots, not drift
+    deadline = time.monotonic()
+    end_time = deadline + sample_duration
+    while deadline < end_time and n < n_est:
         try:
-            bmp_temps.append(safe_float(bmp_sensor.read_temperature()))
-            pressures.append(safe_float(bmp_sensor.read_pressure()) / 100.0)
-            altitudes.append(safe_float(bmp_sensor.read_altitude()))
-            light_levels.append(read_bh1750())
-
-            t_dht, h_dht = read_dht()
-            dht_temps.append(t_dht)
-            humidities.append(h_dht)
-
-            cpu_temps.append(get_cpu_temp())
-            cpu_usages.append(get_cpu_usage())
-            memory_usages.append(get_memory_usage())
+            (t_bmp, p_bmp, a_bmp), lux, (t_dht, h_dht), (c_t, c_u, m_u) = read_sensors()
+            bmp_temps[n] = t_bmp
+            pressures[n] = p_bmp
+            altitudes[n] = a_bmp
+            light_levels[n] = lux
+
+            dht_temps[n] = t_dht
+            humidities[n] = h_dht
+
+            cpu_temps[n] = c_t
+            cpu_usages[n] = c_u
+            memory_usages[n] = m_u
+            n += 1
         except Exception as e:
             print(f"Sensor read error (median block): {e}")
-        time.sleep(sample_interval)
+        deadline = next_deadline(deadline, sample_interval)
+        if deadline < end_time:
+            sleep_until(deadline)
 
-    if not bmp_temps:
+    if n == 0:
         print("No samples collected in median block")
         return
 
-    median_temperature_bmp = np.nanmedian(bmp_temps)
-    median_pressure = np.nanmedian(pressures)
-    median_altitude = np.nanmedian(altitudes)
-    median_temperature_dht = np.nanmedian(dht_temps)
-    median_humidity = np.nanmedian(humidities)
-    median_light_level = np.nanmedian(light_levels)
-    median_cpu_temp = np.nanmedian(cpu_temps)
-    median_cpu_usage = np.nanmedian(cpu_usages)
-    median_memory_usage = np.nanmedian(memory_usages)
-
-    timestamp = datetime.now()
-
-    with open(LOCAL_WEATHER_CSV, "a", newline="") as csvfile:
-        writer = csv.writer(csvfile)
-        writer.writerow([
-            timestamp, median_temperature_bmp, median_pressure, median_altitude,
-            median_temperature_dht, median_humidity, median_light_level
-        ])
-
-    with open(LOCAL_SYSTEM_CSV, "a", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow([timestamp, median_cpu_temp, median_cpu_usage, median_memory_usage])
-
-    print("\n\t-----------------------------------------")
-    print(f"\tData logged at {timestamp}")
-    print(f"\tMedian BMP Temperature: {median_temperature_bmp:.2f} °C, Pressure: {median_pressure:.2f} hPa, Altitude: {median_altitude:.2f} m")
-    print(f"\tMedian DHT Temperature: {median_temperature_dht:.2f} °C, Humidity: {median_humidity:.2f} %")
-    print(f"\tMedian BH1750 Light: {median_light_level:.2f} lx")
-    print(f"\tMedian CPU Temperature: {median_cpu_temp:.2f}°C")
-    print(f"\tMedian CPU Usage: {median_cpu_usage:.1f}%")
-    print(f"\tMedian Memory Usage: {median_memory_usage:.1f}%")
-    print(f"\tSamples made: {len(cpu_temps)}")
-    print("\t-----------------------------------------\n")
+    columns = (
+        bmp_temps[:n], pressures[:n], altitudes[:n],
+        dht_temps[:n], humidities[:n], light_levels[:n],
+        cpu_temps[:n], cpu_usages[:n], memory_usages[:n],
+    )
+    if _HAVE_NUMBA:
+        medians = _aggregate(*columns)
+    else:
+        # uncompiled, indexing ndarrays element-wise is slow; select on plain lists
+        medians = tuple(_nanmedian_small(c.tolist()) for c in columns)
+    (median_temperature_bmp, median_pressure, median_altitude,
+     median_temperature_dht, median_humidity, median_light_level,
+     median_cpu_temp, median_cpu_usage, median_memory_usage) = medians
+
+    # samples carry no timestamps of their own; stamp the block once, here
+    ts_ns = time.time_ns()
+
+    queue_rows(
+        [ts_ns, median_temperature_bmp, median_pressure, median_altitude,
+         median_temperature_dht, median_humidity, median_light_level],
+        [ts_ns, median_cpu_temp, median_cpu_usage, median_memory_usage],
+    )
+    # one writerows per file per block (also covers rows queued by makedata)
+    flush_csvs()
+
+    # one write (one flush under line buffering) per block
+    sys.stdout.write(
+        "\n\t-----------------------------------------\n"
+        f"\tData logged at {format_timestamp(ts_ns)}\n"
+        f"\tMedian BMP Temperature: {median_temperature_bmp:.2f} °C, Pressure: {median_pressure:.2f} hPa, Altitude: {median_altitude:.2f} m\n"
+        f"\tMedian DHT Temperature: {median_temperature_dht:.2f} °C, Humidity: {median_humidity:.2f} %\n"
+        f"\tMedian BH1750 Light: {median_light_level:.2f} lx\n"
+        f"\tMedian CPU Temperature: {median_cpu_temp:.2f}°C\n"
+        f"\tMedian CPU Usage: {median_cpu_usage:.1f}%\n"
+        f"\tMedian Memory Usage: {median_memory_usage:.1f}%\n"
+        f"\tSamples made: {n}\n"
+        "\t-----------------------------------------\n\n"
+    )
 
 def take_pic():
     """
     Capture a still with basic stabilization. Low light -> IR-ish settings.
     """
-    picam2.start()
     picam2.set_controls({
         "AeEnable": True,
         "AwbEnable": True,
@@ -343,16 +733,18 @@ def take_pic():
 
     prev_metadata = None
     stable_count = 0
-    required_stable_iterations = 3
+    # camera stays running between shots, so AE/AWB are usually already settled
+    required_stable_iterations = 1
     max_iterations = 30
     iteration = 0
+    deadline = time.monotonic()
 
     # Original behavior: skip stabilization in low light
     if lux < LOW_LIGHT_LUX:
         iteration = max_iterations
 
     while iteration < max_iterations:
-        _ = picam2.capture_array("main")  # trigger AE/AWB updates
+        # metadata is refreshed every frame; no need to copy out a full-res array
         curr_metadata = picam2.capture_metadata()
 
         if prev_metadata is not None:
@@ -373,7 +765,8 @@ def take_pic():
             print("Camera settings have stabilized.")
             break
 
-        time.sleep(0.5)
+        deadline = next_deadline(deadline, 0.5)
+        sleep_until(deadline)
 
     if iteration == max_iterations:
         print("Max iterations reached; proceeding with capture regardless.")
@@ -381,14 +774,27 @@ def take_pic():
     ts = time.strftime("%Y%m%d_%H%M%S")
     image_path = os.path.join(IMAGE_DIR, f"{ts}.jpg")
     picam2.capture_file(image_path)
-    picam2.stop()
     print(f"Saved image: {image_path}")
 
+def image_chunks(paths):
+    """Split paths into consecutive chunks of at most IMAGE_CHUNK_MAX_BYTES (>= 1 file each)."""
+    chunk, chunk_bytes = [], 0
+    for path in paths:
+        size = os.path.getsize(path)
+        if chunk and chunk_bytes + size > IMAGE_CHUNK_MAX_BYTES:
+            yield chunk
+            chunk, chunk_bytes = [], 0
+        chunk.append(path)
+        chunk_bytes += size
+    if chunk:
+        yield chunk
+
 def send_data():
     """
     Capture a picture, then transfer images and CSVs to the server with retries.
     Delete images locally if successfully transferred.
     """
+    global _weather_fp, _weather_writer, _system_fp, _system_writer
     take_pic()
     print("Transferring data to the server...")
 
@@ -398,9 +804,13 @@ def send_data():
         image_files = image_files[-MAX_IMAGE_FILES:]
 
     if image_files:
-        for path in image_files:
-            ok = scp_with_retries(path, f"{SERVER_ADDRESS}:{SERVER_IMAGE_DIR}")
-            if ok:
+        # bounded chunks, one scp each: a backlog drains chunk by chunk and
+        # sampling keeps going between them
+        for chunk in image_chunks(image_files):
+            if not scp_with_retries(chunk, f"{SERVER_ADDRESS}:{SERVER_IMAGE_DIR}"):
+                print(f"ERROR: Failed to transfer {len(chunk)} images; rest waits for the next cycle")
+                break
+            for path in chunk:
                 try:
                     os.remove(path)
                 except Exception as e:
@@ -409,47 +819,47 @@ def send_data():
     else:
         print("No images found for transfer.")
 
-    # Transfer weather CSV
-    ok = scp_with_retries(LOCAL_WEATHER_CSV, f"{SERVER_ADDRESS}:{SERVER_WEATHER_CSV}")
-    if not ok:
-        print(f"ERROR: Failed to transfer {LOCAL_WEATHER_CSV}")
-
-    # Transfer system CSV
-    ok = scp_with_retries(LOCAL_SYSTEM_CSV, f"{SERVER_ADDRESS}:{SERVER_SYSTEM_CSV}")
-    if not ok:
-        print(f"ERROR: Failed to transfer {LOCAL_SYSTEM_CSV}")
+    # Rotate the logs into .sending spools; only rows not yet on the server go up
+    flush_csvs(sync=True)
+    _weather_fp, _weather_writer = spool_csv(
+        LOCAL_WEATHER_CSV, _weather_fp, _WEATHER_HEADER_BYTES)
+    _system_fp, _system_writer = spool_csv(
+        LOCAL_SYSTEM_CSV, _system_fp, _SYSTEM_HEADER_BYTES)
+
+    # Transfer weather and system CSVs; spools from earlier failed cycles go first
+    for local_csv, remote_csv, header in (
+        (LOCAL_WEATHER_CSV, SERVER_WEATHER_CSV, _WEATHER_HEADER_BYTES),
+        (LOCAL_SYSTEM_CSV, SERVER_SYSTEM_CSV, _SYSTEM_HEADER_BYTES),
+    ):
+        for spool in pending_spools(local_csv):
+            if not append_remote_with_retries(spool, remote_csv, header):
+                print(f"ERROR: Failed to transfer {spool}; kept for the next cycle")
+                break
+            os.remove(spool)
 
     print("Transfer phase complete.")
 
 def del_data():
-    """Clear local CSVs (retain headers)."""
-    with open(LOCAL_WEATHER_CSV, "w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow([
-            "Timestamp",
-            "BMP_Temperature_C",
-            "BMP_Pressure_hPa",
-            "BMP_Altitude_m",
-            "DHT_Temperature_C",
-            "DHT_Humidity_percent",
-            "BH1750_Light_lx",
-        ])
-
-    with open(LOCAL_SYSTEM_CSV, "w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow([
-            "Timestamp",
-            "CPU_Temperature_C",
-            "CPU_Usage_percent",
-            "Memory_Usage_percent",
-        ])
-    print("Local data cleared to save space.\n")
+    """
+    Bound the local backlog of unsent spools to SPOOL_MAX_BYTES per CSV,
+    discarding the oldest only once the cap is exceeded (server down for long).
+    The live CSVs only hold rows not yet sent, so they are never truncated here.
+    """
+    for path in (LOCAL_WEATHER_CSV, LOCAL_SYSTEM_CSV):
+        spools = pending_spools(path)
+        total = sum(os.path.getsize(spool) for spool in spools)
+        while spools and total > SPOOL_MAX_BYTES:
+            spool = spools.pop(0)
+            total -= os.path.getsize(spool)
+            os.remove(spool)
+            print(f"Discarded oldest unsent spool (backlog over cap): {spool}")
 
 # -----------------------------
 # Main
 # -----------------------------
 def main():
     ensure_paths()
+    start_ssh_master()
     print("Weather Station Initialized! Harvesting data...\n")
 
     write_timer = time.time()
@@ -483,5 +893,10 @@ def main():
             print(f"Unexpected error: {e}")
             break
 
+    try:
+        flush_csvs(sync=True)
+    finally:
+        picam2.stop()
+
 if __name__ == "__main__":
     main()